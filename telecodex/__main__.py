@@ -1,25 +1,21 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import importlib.util
 import os
+import random
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
 
 import classyclick
 import click
 from platformdirs import user_config_dir
-from telegram.ext import ApplicationBuilder
 
+from telecodex._config import load_settings_from_toml
 from telecodex.codex_client import CodexStdioClient
-from telecodex.telegram_handlers import PENDING_MODEL_INPUT_KEY, register_handlers, setup_bot_commands
-
-try:
-    import tomllib
-except ModuleNotFoundError:  # pragma: no cover - Python 3.10 fallback
-    import tomli as tomllib
 
 
 @dataclass(slots=True)
@@ -28,57 +24,25 @@ class Settings:
     allowed_chat_id: int | None
     acp_log_file: str | None
     poll_timeout_seconds: int
+    webhook_url: str | None
+    webhook_port: int
     codex_app_server_cmd: str
     codex_model: str
     codex_cwd: str
     codex_approval_policy: str
 
 
+RESTART_BACKOFF_INITIAL_SECONDS = 0.2
+RESTART_BACKOFF_MAX_SECONDS = 30.0
+
 DEFAULT_CONFIG_PATH = str(Path(user_config_dir('telecodex')) / 'config.toml')
-CONFIG_SECTION = 'telecodex'
-CONFIG_KEYS = {
-    'telegram_bot_token',
-    'allowed_chat_id',
-    'acp_log_file',
-    'poll_timeout_seconds',
-    'codex_app_server_cmd',
-    'codex_model',
-    'codex_cwd',
-    'codex_approval_policy',
-}
-
-
-def load_settings_from_toml(config_path: str) -> dict[str, Any]:
-    path = Path(config_path).expanduser()
-    if not path.exists():
-        return {}
-
-    with path.open('rb') as fh:
-        data = tomllib.load(fh)
-
-    if not isinstance(data, dict):
-        raise ValueError(f'Config file {path} must contain a TOML table at the root.')
-
-    section = data.get(CONFIG_SECTION)
-    if section is None:
-        candidate = data
-    elif isinstance(section, dict):
-        candidate = section
-    else:
-        raise ValueError(f'[{CONFIG_SECTION}] in {path} must be a TOML table.')
-
-    values: dict[str, Any] = {}
-    for key in CONFIG_KEYS:
-        value = candidate.get(key)
-        if value is not None:
-            values[key] = value
-    return values
 
 
 def config_callback(ctx: click.Context, _: click.Parameter, value: str) -> str:
     try:
+        # tomllib.TOMLDecodeError subclasses ValueError, so this also covers parse errors.
         config_values = load_settings_from_toml(value)
-    except (OSError, ValueError, tomllib.TOMLDecodeError) as exc:
+    except (OSError, ValueError) as exc:
         raise click.BadParameter(str(exc)) from exc
     if config_values:
         existing = dict(ctx.default_map or {})
@@ -97,9 +61,29 @@ def require_env(settings: Settings) -> None:
             file=sys.stderr,
         )
         sys.exit(1)
+    # run_webhook needs tornado, which plain python-telegram-bot does not pull
+    # in; fail with an install hint here instead of looping in the retry loop.
+    if settings.webhook_url and importlib.util.find_spec('tornado') is None:
+        print(
+            'Webhook mode requires the webhooks extra: pip install "telecodex[webhooks]"',
+            file=sys.stderr,
+        )
+        sys.exit(1)
 
 
 def run_bot(settings: Settings) -> None:
+    # telegram (and its httpx stack) is by far the heaviest import; defer it so
+    # --help and config errors don't pay for it.
+    from telegram.ext import ApplicationBuilder
+    from telegram.request import HTTPXRequest
+
+    from telecodex.telegram_handlers import (
+        CODEX_EXECUTOR_KEY,
+        PENDING_MODEL_INPUT_KEY,
+        register_handlers,
+        setup_bot_commands,
+    )
+
     require_env(settings)
 
     codex = CodexStdioClient(
@@ -109,30 +93,55 @@ def run_bot(settings: Settings) -> None:
         settings.codex_approval_policy,
         settings.acp_log_file,
     )
+    backoff = RESTART_BACKOFF_INITIAL_SECONDS
     while True:
+        codex_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='codex')
         try:
             codex.start()
-            app = ApplicationBuilder().token(settings.telegram_bot_token).post_init(setup_bot_commands).build()
+            backoff = RESTART_BACKOFF_INITIAL_SECONDS
+            app = (
+                ApplicationBuilder()
+                .token(settings.telegram_bot_token)
+                # Verbose turns fan replies out concurrently; the default pool of 1
+                # would serialize them behind a single connection.
+                .request(HTTPXRequest(connection_pool_size=32))
+                .post_init(setup_bot_commands)
+                .build()
+            )
             app.bot_data['codex'] = codex
+            app.bot_data[CODEX_EXECUTOR_KEY] = codex_executor
             app.bot_data['allowed_chat_id'] = settings.allowed_chat_id
             app.bot_data['verbose'] = False
             app.bot_data[PENDING_MODEL_INPUT_KEY] = False
-            register_handlers(app)
+            register_handlers(app, settings.allowed_chat_id)
 
             print('Bot is running (Telegram <-> codex app-server over stdio).')
-            app.run_polling(
-                allowed_updates=['message', 'callback_query'],
-                timeout=settings.poll_timeout_seconds,
-                close_loop=False,
-            )
+            if settings.webhook_url:
+                app.run_webhook(
+                    listen='0.0.0.0',
+                    port=settings.webhook_port,
+                    webhook_url=settings.webhook_url,
+                    allowed_updates=['message', 'callback_query'],
+                    close_loop=False,
+                )
+            else:
+                app.run_polling(
+                    allowed_updates=['message', 'callback_query'],
+                    timeout=settings.poll_timeout_seconds,
+                    close_loop=False,
+                )
             return
         except KeyboardInterrupt:
             print('Stopped by user')
             return
         except Exception as exc:  # noqa: BLE001
             print(f'Loop error: {exc}', file=sys.stderr)
-            time.sleep(3)
+            # Jittered exponential backoff: quick on transient hiccups, gentle
+            # when the app-server is persistently crashing.
+            time.sleep(backoff * (0.5 + random.random()))
+            backoff = min(backoff * 2, RESTART_BACKOFF_MAX_SECONDS)
         finally:
+            codex_executor.shutdown(wait=False)
             codex.stop()
 
 
@@ -173,10 +182,24 @@ class Telecodex:
     )
     poll_timeout_seconds: int = classyclick.Option(
         envvar='POLL_TIMEOUT_SECONDS',
-        default=30,
+        default=50,
+        type=int,
+        show_envvar=True,
+        help='Telegram long-poll timeout in seconds (50 is the Bot API maximum).',
+    )
+    webhook_url: str | None = classyclick.Option(
+        envvar='TELEGRAM_WEBHOOK_URL',
+        default=None,
+        type=str,
+        show_envvar=True,
+        help='Public HTTPS URL for Telegram webhook updates; when set, polling is disabled.',
+    )
+    webhook_port: int = classyclick.Option(
+        envvar='TELEGRAM_WEBHOOK_PORT',
+        default=8443,
         type=int,
         show_envvar=True,
-        help='Telegram polling timeout in seconds.',
+        help='Local port the webhook server listens on.',
     )
     codex_app_server_cmd: str = classyclick.Option(
         envvar='CODEX_APP_SERVER_CMD',
@@ -213,6 +236,8 @@ class Telecodex:
             allowed_chat_id=self.allowed_chat_id,
             acp_log_file=self.acp_log_file,
             poll_timeout_seconds=self.poll_timeout_seconds,
+            webhook_url=self.webhook_url,
+            webhook_port=self.webhook_port,
             codex_app_server_cmd=self.codex_app_server_cmd,
             codex_model=self.codex_model,
             codex_cwd=self.codex_cwd,
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+try:
+    import tomllib
+except ModuleNotFoundError:  # pragma: no cover - Python 3.10 fallback
+    import tomli as tomllib
+
+CONFIG_SECTION = 'telecodex'
+CONFIG_KEYS: frozenset[str] = frozenset(
+    {
+        'telegram_bot_token',
+        'allowed_chat_id',
+        'acp_log_file',
+        'poll_timeout_seconds',
+        'webhook_url',
+        'webhook_port',
+        'codex_app_server_cmd',
+        'codex_model',
+        'codex_cwd',
+        'codex_approval_policy',
+    }
+)
+
+# Parsed-config cache keyed by file identity; hits skip the TOML parse on
+# restarts that reuse an unchanged config.
+_TOML_CACHE: dict[Path, tuple[tuple[int, int], dict[str, Any]]] = {}
+
+
+def parse_settings_from_toml(data: bytes, source: str = 'config') -> dict[str, Any]:
+    """Extract known settings from raw TOML bytes; `source` only labels errors."""
+    parsed = tomllib.loads(data.decode('utf-8'))
+
+    if not isinstance(parsed, dict):
+        raise ValueError(f'Config file {source} must contain a TOML table at the root.')
+
+    section = parsed.get(CONFIG_SECTION)
+    if section is None:
+        candidate = parsed
+    elif isinstance(section, dict):
+        candidate = section
+    else:
+        raise ValueError(f'[{CONFIG_SECTION}] in {source} must be a TOML table.')
+
+    return {key: value for key, value in candidate.items() if key in CONFIG_KEYS and value is not None}
+
+
+def load_settings_from_toml(config_path: str) -> dict[str, Any]:
+    path = Path(config_path).expanduser()
+    try:
+        stat = path.stat()
+    except OSError:
+        return {}
+
+    cache_key = (stat.st_mtime_ns, stat.st_size)
+    cached = _TOML_CACHE.get(path)
+    if cached is not None and cached[0] == cache_key:
+        return dict(cached[1])
+
+    settings = parse_settings_from_toml(path.read_bytes(), source=str(path))
+    _TOML_CACHE[path] = (cache_key, settings)
+    return dict(settings)
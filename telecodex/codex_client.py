@@ -1,20 +1,74 @@
 from __future__ import annotations
 
-import copy
+import collections
+import io
 import json
+import queue
 import shlex
 import subprocess
+import sys
 import threading
+from concurrent.futures import Future
 from contextlib import suppress
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, TextIO
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None  # type: ignore[assignment]
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup, install with telecodex[speed]
+    orjson = None  # type: ignore[assignment]
+
+if orjson is None:
+    json_loads = json.loads
+
+    def json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+else:
+    json_loads = orjson.loads
+    json_dumps = orjson.dumps
+
+READ_CHUNK_SIZE = 65536
+PIPE_BUFFER_SIZE = 1024 * 1024
+# Telegram truncates replies to 4096 chars; accumulating much past that is wasted work.
+MAX_REPLY_CHARS = 4096
+STDERR_TAIL_LINES = 200
+
+# The initialize payload never varies; build it once instead of per start().
+CLIENT_INFO = {'name': 'telegram-codex-bot', 'version': '0.1.0'}
+
+SILENT_METHODS = frozenset(
+    {
+        'item/agentMessage/delta',
+        'turn/completed',
+        'account/rateLimits/updated',
+        'codex/event/token_count',
+        'thread/tokenUsage/updated',
+    }
+)
+
+
+def _pipe_size() -> int:
+    """Pipe capacity for the app-server pipes, or -1 to keep the OS default."""
+    if fcntl is None or not hasattr(fcntl, 'F_SETPIPE_SZ'):
+        return -1
+    try:
+        max_size = int(Path('/proc/sys/fs/pipe-max-size').read_bytes())
+    except (OSError, ValueError):
+        return PIPE_BUFFER_SIZE
+    return min(PIPE_BUFFER_SIZE, max_size)
 
 
 @dataclass(slots=True)
 class AskResult:
     reply: str
-    unprocessed_messages: list[str]
+    unprocessed_messages: list[tuple[dict[str, Any], str]]
 
 
 @dataclass(slots=True)
@@ -27,15 +81,17 @@ def should_report_verbose_unhandled_message(msg: dict[str, Any]) -> bool:
     method = msg.get('method')
     if not isinstance(method, str):
         return True
-    if 'delta' in method.lower():
+    return _should_report_method(method)
+
+
+@lru_cache(maxsize=256)
+def _should_report_method(method: str) -> bool:
+    # Only a handful of distinct methods ever appear, so the substring scans
+    # run once per method instead of once per streamed message.
+    if method in SILENT_METHODS:
         return False
-    if method in {
-        'item/agentMessage/delta',
-        'turn/completed',
-        'account/rateLimits/updated',
-        'codex/event/token_count',
-        'thread/tokenUsage/updated',
-    }:
+    # ACP method names are camelCase, so the two casings cover any delta variant.
+    if 'delta' in method or 'Delta' in method:
         return False
     return True
 
@@ -46,11 +102,14 @@ def extract_error_message(error_payload: Any) -> str:
 
     raw_message = error_payload.get('message')
     if isinstance(raw_message, str) and raw_message.strip():
-        with suppress(json.JSONDecodeError, TypeError):
-            parsed = json.loads(raw_message)
-            detail = parsed.get('detail') if isinstance(parsed, dict) else None
-            if isinstance(detail, str) and detail.strip():
-                return detail
+        # Most error messages are plain prose; only probe for embedded JSON when
+        # the payload can actually be one, instead of paying for a failed parse.
+        if raw_message.lstrip().startswith(('{', '[')):
+            with suppress(ValueError, TypeError):
+                parsed = json_loads(raw_message)
+                detail = parsed.get('detail') if isinstance(parsed, dict) else None
+                if isinstance(detail, str) and detail.strip():
+                    return detail
         return raw_message
 
     codex_error_info = error_payload.get('codexErrorInfo')
@@ -62,14 +121,30 @@ def extract_error_message(error_payload: Any) -> str:
 class CodexStdioClient:
     def __init__(self, command: str, model: str, cwd: str, approval_policy: str, acp_log_file: str | None) -> None:
         self.command = command
+        # Parsed once here so a bad command fails at construction, not on the
+        # reconnect path, and restarts skip the shlex re-parse.
+        self.argv = shlex.split(command)
+        if not self.argv:
+            raise RuntimeError('CODEX_APP_SERVER_CMD is empty')
         self.model = model
         self.cwd = cwd
         self.approval_policy = approval_policy
         self.acp_log_file = Path(acp_log_file).expanduser() if acp_log_file else None
-        self.proc: subprocess.Popen[str] | None = None
+        self.proc: subprocess.Popen[bytes] | None = None
         self.next_id = 1
-        self.lock = threading.Lock()
+        self.lock = threading.Lock()  # serializes turns; independent RPCs multiplex via the reader thread
+        self.send_lock = threading.Lock()
+        self.pending_lock = threading.Lock()
+        self.pending: dict[Any, Future[dict[str, Any]]] = {}
+        self.turn_events: queue.SimpleQueue[tuple[dict[str, Any], str] | None] | None = None
+        self.reader_thread: threading.Thread | None = None
+        self.reader_error: Exception | None = None
+        self.stderr_tail: collections.deque[str] = collections.deque(maxlen=STDERR_TAIL_LINES)
+        self.stderr_thread: threading.Thread | None = None
         self.acp_log_lock = threading.Lock()
+        self.acp_log_fh: TextIO | None = None
+        self.acp_log_queue: queue.SimpleQueue[str | None] | None = None
+        self.acp_log_thread: threading.Thread | None = None
         self.rate_limits_lock = threading.Lock()
         self.rate_limits_by_id: dict[Any, dict[str, Any]] = {}
         self.token_usage_lock = threading.Lock()
@@ -77,29 +152,25 @@ class CodexStdioClient:
         self.thread_id: str | None = None
 
     def start(self) -> None:
-        argv = shlex.split(self.command)
-        if not argv:
-            raise RuntimeError('CODEX_APP_SERVER_CMD is empty')
-
         self.proc = subprocess.Popen(
-            argv,
+            self.argv,
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
+            bufsize=READ_CHUNK_SIZE,
+            pipesize=_pipe_size(),
         )
+        self.pending = {}
+        self.turn_events = None
+        self.reader_error = None
+        self.stderr_tail.clear()
         self._ensure_log_file()
+        self.stderr_thread = threading.Thread(target=self._stderr_loop, daemon=True)
+        self.stderr_thread.start()
+        self.reader_thread = threading.Thread(target=self._reader_loop, daemon=True)
+        self.reader_thread.start()
 
-        self._request(
-            'initialize',
-            {
-                'clientInfo': {
-                    'name': 'telegram-codex-bot',
-                    'version': '0.1.0',
-                },
-            },
-        )
+        self._request('initialize', {'clientInfo': CLIENT_INFO})
         self._notify('initialized', {})
 
         start_result = self._request(
@@ -111,64 +182,197 @@ class CodexStdioClient:
             },
         )
 
-        thread = start_result.get('thread') if isinstance(start_result, dict) else None
-        thread_id = thread.get('id') if isinstance(thread, dict) else None
+        try:
+            thread_id = start_result['thread']['id']
+        except (KeyError, TypeError):
+            thread_id = None
         if not thread_id:
             raise RuntimeError(f'thread/start did not return thread id: {start_result}')
         self.thread_id = thread_id
 
+    def _stderr_loop(self) -> None:
+        """Continuously drain child stderr into a bounded tail buffer.
+
+        Keeps the pipe from filling (and blocking the child) when the server is
+        chatty, and preserves the last lines for _ensure_running diagnostics.
+        """
+        proc = self.proc
+        if proc is None or proc.stderr is None:
+            return
+        with suppress(OSError, ValueError):
+            for line in proc.stderr:
+                self.stderr_tail.append(line.decode('utf-8', 'replace'))
+
+    def _dead_server_error(self) -> RuntimeError:
+        if self.stderr_thread is not None:
+            # Give the drain thread a moment to consume the final lines.
+            self.stderr_thread.join(timeout=1)
+        err = ''.join(self.stderr_tail)
+        return RuntimeError(f'app-server not running. stderr: {err[:2000]}')
+
     def _ensure_running(self) -> None:
         if self.proc is None or self.proc.poll() is not None:
-            err = ''
-            if self.proc and self.proc.stderr:
-                try:
-                    err = self.proc.stderr.read()
-                except Exception:
-                    err = ''
-            raise RuntimeError(f'app-server not running. stderr: {err[:2000]}')
+            raise self._dead_server_error()
 
     def _send(self, obj: dict[str, Any]) -> None:
-        self._ensure_running()
-        assert self.proc is not None and self.proc.stdin is not None
-        line = json.dumps(obj, ensure_ascii=False)
-        self.proc.stdin.write(line + '\n')
-        self.proc.stdin.flush()
+        if self.proc is None or self.proc.stdin is None:
+            raise RuntimeError('app-server not running. stderr: ')
+        payload = json_dumps(obj)
+        try:
+            with self.send_lock:
+                self.proc.stdin.write(payload + b'\n')
+                self.proc.stdin.flush()
+        except (OSError, ValueError):
+            # A dead child shows up as a broken pipe; only then pay the
+            # waitpid poll to raise the informative error with stderr.
+            self._ensure_running()
+            raise
+
+    def _reader_loop(self) -> None:
+        # Capture the pipe and buffer once, like _stderr_loop does: after a
+        # restart, self.proc points at the new child and a stale reader must
+        # never touch its stdout or share framing state with the new reader.
+        proc = self.proc
+        if proc is None or proc.stdout is None:
+            return
+        buffer = bytearray()
+        try:
+            while True:
+                msg, raw_message = self._read_message(proc, buffer)
+                req_id = msg.get('id')
+                if req_id is not None and 'method' not in msg:
+                    with self.pending_lock:
+                        future = self.pending.pop(req_id, None)
+                    if future is not None:
+                        future.set_result(msg)
+                    continue
+                events = self.turn_events
+                if events is not None:
+                    events.put((msg, raw_message))
+        except Exception as exc:  # noqa: BLE001
+            self._fail_pending(exc)
+
+    def _fail_pending(self, exc: Exception) -> None:
+        # reader_error is set under pending_lock so _request either sees it
+        # before registering or has its future drained here — a future can
+        # never be registered after the reader died and then wait forever.
+        with self.pending_lock:
+            self.reader_error = exc
+            pending = list(self.pending.values())
+            self.pending.clear()
+        for future in pending:
+            if not future.done():
+                future.set_exception(exc)
+        events = self.turn_events
+        if events is not None:
+            events.put(None)
 
     def _ensure_log_file(self) -> None:
         if self.acp_log_file is None:
             return
         self.acp_log_file.parent.mkdir(parents=True, exist_ok=True)
-        with self.acp_log_file.open('a', encoding='utf-8'):
-            pass
+        with self.acp_log_lock:
+            if self.acp_log_fh is None:
+                self.acp_log_fh = self.acp_log_file.open('a', encoding='utf-8')
+                self.acp_log_queue = queue.SimpleQueue()
+                self.acp_log_thread = threading.Thread(target=self._log_writer_loop, daemon=True)
+                self.acp_log_thread.start()
 
-    def _log_acp_message(self, line: str) -> None:
-        if self.acp_log_file is None:
+    def _close_log_file(self) -> None:
+        with self.acp_log_lock:
+            log_queue = self.acp_log_queue
+            log_thread = self.acp_log_thread
+            self.acp_log_queue = None
+            self.acp_log_thread = None
+        if log_queue is None:
             return
+        log_queue.put(None)
+        if log_thread is not None:
+            log_thread.join(timeout=5)
         with self.acp_log_lock:
-            with self.acp_log_file.open('a', encoding='utf-8') as fh:
-                fh.write(line + '\n')
-
-    def _read_message(self) -> tuple[dict[str, Any], str]:
-        self._ensure_running()
-        assert self.proc is not None and self.proc.stdout is not None
-
+            if self.acp_log_fh is not None:
+                with suppress(Exception):
+                    self.acp_log_fh.close()
+                self.acp_log_fh = None
+
+    def _log_writer_loop(self) -> None:
+        """Drain queued log lines and write each backlog in one syscall.
+
+        Bursts of streaming deltas collapse into a single write+flush instead
+        of paying one per line on the reader thread.
+        """
+        fh = self.acp_log_fh
+        log_queue = self.acp_log_queue
+        if fh is None or log_queue is None:
+            return
+        while True:
+            line = log_queue.get()
+            if line is None:
+                return
+            lines = [line]
+            with suppress(queue.Empty):
+                while True:
+                    line = log_queue.get_nowait()
+                    if line is None:
+                        self._write_log_lines(fh, lines)
+                        return
+                    lines.append(line)
+            self._write_log_lines(fh, lines)
+
+    @staticmethod
+    def _write_log_lines(fh: TextIO, lines: list[str]) -> None:
+        with suppress(OSError, ValueError):
+            fh.write('\n'.join(lines) + '\n')
+            fh.flush()
+
+    def _read_line(self, proc: subprocess.Popen[bytes], buffer: bytearray) -> bytes:
+        stdout = proc.stdout
+        assert stdout is not None
         while True:
-            line = self.proc.stdout.readline()
-            if line == '':
-                self._ensure_running()
+            newline = buffer.find(b'\n')
+            if newline != -1:
+                line = bytes(buffer[:newline])
+                del buffer[: newline + 1]
+                return line
+            chunk = stdout.read1(READ_CHUNK_SIZE)
+            if not chunk:
+                # EOF nearly always means the child died; give it a moment to be
+                # reapable so the error carries the stderr tail.
+                with suppress(subprocess.TimeoutExpired):
+                    proc.wait(timeout=1)
+                if proc.poll() is not None:
+                    raise self._dead_server_error()
                 raise RuntimeError('Unexpected EOF from app-server stdout')
-            line = line.strip()
+            buffer += chunk
+
+    def _read_message(self, proc: subprocess.Popen[bytes], buffer: bytearray) -> tuple[dict[str, Any], str]:
+        # No liveness poll here: this runs once per frame on the reader thread and
+        # proc.poll() is a waitpid syscall. A dead child surfaces as EOF in _read_line,
+        # which does the poll on that error path.
+        while True:
+            # Frames are newline-delimited; only a stray \r can remain after splitting.
+            line = self._read_line(proc, buffer).rstrip(b'\r')
             if not line:
                 continue
-            self._log_acp_message(line)
+            # 'replace' keeps a stray invalid byte from killing the reader
+            # thread; the json_loads below rejects the mangled frame anyway.
+            raw_message = line.decode('utf-8', 'replace')
+            log_queue = self.acp_log_queue
+            if log_queue is not None:
+                log_queue.put(raw_message)
             try:
-                msg = json.loads(line)
-            except json.JSONDecodeError:
+                msg = json_loads(line)
+            except ValueError:
                 continue
             if isinstance(msg, dict):
+                # Interned method names make the downstream literal comparisons
+                # (match dispatch, SILENT_METHODS, lru_cache keys) pointer-equal.
+                method = msg.get('method')
+                if type(method) is str:
+                    msg['method'] = sys.intern(method)
                 self._track_rate_limits(msg)
                 self._track_token_usage(msg)
-                return msg, line
+                return msg, raw_message
 
     def _track_rate_limits(self, msg: dict[str, Any]) -> None:
         if msg.get('method') != 'account/rateLimits/updated':
@@ -180,32 +384,32 @@ class CodexStdioClient:
         if not isinstance(rate_limits, dict):
             return
         limit_id = rate_limits.get('limitId')
+        # Freshly parsed payloads are stored as-is and treated as immutable from here on.
         with self.rate_limits_lock:
-            self.rate_limits_by_id[limit_id] = copy.deepcopy(rate_limits)
+            self.rate_limits_by_id[limit_id] = rate_limits
 
     def get_rate_limits_snapshot(self) -> dict[Any, dict[str, Any]]:
         with self.rate_limits_lock:
-            return copy.deepcopy(self.rate_limits_by_id)
+            return dict(self.rate_limits_by_id)
 
     def read_rate_limits(self) -> dict[Any, dict[str, Any]]:
-        with self.lock:
-            result = self._request('account/rateLimits/read', {})
+        result = self._request('account/rateLimits/read', {})
 
         by_limit_id = result.get('rateLimitsByLimitId') if isinstance(result, dict) else None
         normalized: dict[Any, dict[str, Any]] = {}
         if isinstance(by_limit_id, dict):
             for key, value in by_limit_id.items():
                 if isinstance(value, dict):
-                    normalized[key] = copy.deepcopy(value)
+                    normalized[key] = value
         else:
             single = result.get('rateLimits') if isinstance(result, dict) else None
             if isinstance(single, dict):
-                normalized[single.get('limitId')] = copy.deepcopy(single)
+                normalized[single.get('limitId')] = single
 
         if normalized:
             with self.rate_limits_lock:
-                self.rate_limits_by_id = copy.deepcopy(normalized)
-            return normalized
+                self.rate_limits_by_id = normalized
+            return dict(normalized)
 
         return self.get_rate_limits_snapshot()
 
@@ -222,23 +426,20 @@ class CodexStdioClient:
         if not isinstance(info, dict):
             return
         with self.token_usage_lock:
-            self.latest_token_usage = copy.deepcopy(info)
+            self.latest_token_usage = info
 
     def get_latest_token_usage(self) -> dict[str, Any] | None:
         with self.token_usage_lock:
-            return copy.deepcopy(self.latest_token_usage)
+            return self.latest_token_usage
 
     def get_model(self) -> str:
-        with self.lock:
-            return self.model
+        return self.model
 
     def set_model(self, model: str) -> None:
-        with self.lock:
-            self.model = model
+        self.model = model
 
     def list_models(self) -> list[ModelOption]:
-        with self.lock:
-            result = self._request('model/list', {})
+        result = self._request('model/list', {})
 
         data = result.get('data') if isinstance(result, dict) else None
         if not isinstance(data, list):
@@ -256,95 +457,122 @@ class CodexStdioClient:
             models.append(ModelOption(model_id=raw_model_id, display_name=display_name))
         return models
 
-    def _request(
-        self, method: str, params: dict[str, Any], unprocessed_messages: list[str] | None = None
-    ) -> dict[str, Any]:
-        req_id = self.next_id
-        self.next_id += 1
-
-        self._send({'id': req_id, 'method': method, 'params': params})
-
-        while True:
-            msg, raw_message = self._read_message()
-            if msg.get('id') == req_id:
-                if 'error' in msg:
-                    raise RuntimeError(f'{method} failed: {msg["error"]}')
-                return msg.get('result', {})
-            if unprocessed_messages is not None and should_report_verbose_unhandled_message(msg):
-                unprocessed_messages.append(raw_message)
+    def _request(self, method: str, params: dict[str, Any]) -> dict[str, Any]:
+        future: Future[dict[str, Any]] = Future()
+        with self.send_lock:
+            req_id = self.next_id
+            self.next_id += 1
+        with self.pending_lock:
+            if self.reader_error is not None:
+                raise RuntimeError(f'app-server reader stopped: {self.reader_error}') from self.reader_error
+            self.pending[req_id] = future
+
+        try:
+            self._send({'id': req_id, 'method': method, 'params': params})
+        except Exception:
+            with self.pending_lock:
+                self.pending.pop(req_id, None)
+            raise
+
+        msg = future.result()
+        if 'error' in msg:
+            raise RuntimeError(f'{method} failed: {msg["error"]}')
+        return msg.get('result', {})
 
     def _notify(self, method: str, params: dict[str, Any]) -> None:
         self._send({'method': method, 'params': params})
 
-    def ask(self, text: str) -> AskResult:
+    def ask(
+        self,
+        text: str,
+        on_delta: Callable[[str], None] | None = None,
+        max_chars: int = MAX_REPLY_CHARS,
+        collect_unprocessed: bool = True,
+    ) -> AskResult:
         with self.lock:
             self._ensure_running()
             if not self.thread_id:
                 raise RuntimeError('No thread initialized')
 
-            unprocessed_messages: list[str] = []
-            turn_result = self._request(
-                'turn/start',
-                {
-                    'threadId': self.thread_id,
-                    'input': [{'type': 'text', 'text': text}],
-                    'model': self.model,
-                },
-                unprocessed_messages=unprocessed_messages,
-            )
-            turn = turn_result.get('turn') if isinstance(turn_result, dict) else None
-            turn_id = turn.get('id') if isinstance(turn, dict) else None
-            if not turn_id:
-                raise RuntimeError(f'turn/start did not return turn id: {turn_result}')
-
-            chunks: list[str] = []
-            fallback_final: str | None = None
-            turn_error_message: str | None = None
-
-            while True:
-                msg, raw_message = self._read_message()
-
-                method = msg.get('method')
-                params = msg.get('params')
-                if not method or not isinstance(params, dict):
-                    unprocessed_messages.append(raw_message)
-                    continue
-
-                if method == 'item/agentMessage/delta' and params.get('turnId') == turn_id:
-                    delta = params.get('delta')
-                    if isinstance(delta, str):
-                        chunks.append(delta)
-                    continue
-
-                if method == 'error' and params.get('turnId') == turn_id:
-                    error_message = extract_error_message(params.get('error'))
-                    turn_error_message = error_message
-                    if params.get('willRetry') is False:
-                        raise RuntimeError(error_message)
-                    continue
-
-                if method == 'turn/completed':
-                    completed_turn = params.get('turn')
-                    completed_turn_id = completed_turn.get('id') if isinstance(completed_turn, dict) else None
-                    if completed_turn_id != turn_id:
-                        if should_report_verbose_unhandled_message(msg):
-                            unprocessed_messages.append(raw_message)
+            unprocessed_messages: list[tuple[dict[str, Any], str]] = []
+            events: queue.SimpleQueue[tuple[dict[str, Any], str] | None] = queue.SimpleQueue()
+            self.turn_events = events
+            try:
+                turn_result = self._request(
+                    'turn/start',
+                    {
+                        'threadId': self.thread_id,
+                        'input': [{'type': 'text', 'text': text}],
+                        'model': self.model,
+                    },
+                )
+                try:
+                    turn_id = turn_result['turn']['id']
+                except (KeyError, TypeError):
+                    turn_id = None
+                if not turn_id:
+                    raise RuntimeError(f'turn/start did not return turn id: {turn_result}')
+
+                reply_buf = io.StringIO()
+                fallback_final: str | None = None
+                turn_error_message: str | None = None
+
+                events_get = events.get
+                while True:
+                    event = events_get()
+                    if event is None:
+                        self._ensure_running()
+                        raise self.reader_error or RuntimeError('app-server stream closed mid-turn')
+                    msg, raw_message = event
+
+                    if not msg.get('method') or not isinstance(msg.get('params'), dict):
+                        if collect_unprocessed:
+                            unprocessed_messages.append((msg, raw_message))
                         continue
 
-                    agent_state = completed_turn.get('agentState') if isinstance(completed_turn, dict) else None
-                    message = agent_state.get('message') if isinstance(agent_state, dict) else None
-                    if isinstance(message, str) and message.strip():
-                        fallback_final = message
-                    if completed_turn.get('status') == 'failed':
-                        error_message = extract_error_message(completed_turn.get('error'))
-                        if error_message == 'Unknown app-server error' and turn_error_message:
-                            error_message = turn_error_message
-                        raise RuntimeError(error_message)
-                    break
-                if should_report_verbose_unhandled_message(msg):
-                    unprocessed_messages.append(raw_message)
-
-            final = ''.join(chunks).strip()
+                    # Structural match compiles the method/shape dispatch into one pass
+                    # instead of the per-event isinstance/get ladder it replaces.
+                    match msg:
+                        case {
+                            'method': 'item/agentMessage/delta',
+                            'params': {'turnId': event_turn_id, 'delta': str(delta)},
+                        } if event_turn_id == turn_id:
+                            # Past the cap, keep draining frames (the stream must reach
+                            # turn/completed) but stop accumulating discarded text.
+                            if reply_buf.tell() < max_chars:
+                                reply_buf.write(delta)
+                                if on_delta is not None:
+                                    on_delta(delta)
+                        case {'method': 'error', 'params': {'turnId': event_turn_id} as params} if (
+                            event_turn_id == turn_id
+                        ):
+                            error_message = extract_error_message(params.get('error'))
+                            turn_error_message = error_message
+                            if params.get('willRetry') is False:
+                                raise RuntimeError(error_message)
+                        case {
+                            'method': 'turn/completed',
+                            'params': {'turn': {'id': completed_turn_id} as completed_turn},
+                        } if completed_turn_id == turn_id:
+                            try:
+                                message = completed_turn['agentState']['message']
+                            except (KeyError, TypeError):
+                                message = None
+                            if isinstance(message, str) and message.strip():
+                                fallback_final = message
+                            if completed_turn.get('status') == 'failed':
+                                error_message = extract_error_message(completed_turn.get('error'))
+                                if error_message == 'Unknown app-server error' and turn_error_message:
+                                    error_message = turn_error_message
+                                raise RuntimeError(error_message)
+                            break
+                        case _:
+                            if collect_unprocessed and should_report_verbose_unhandled_message(msg):
+                                unprocessed_messages.append((msg, raw_message))
+            finally:
+                self.turn_events = None
+
+            final = reply_buf.getvalue().strip()
             if final:
                 return AskResult(reply=final, unprocessed_messages=unprocessed_messages)
             if fallback_final:
@@ -354,16 +582,26 @@ class CodexStdioClient:
             )
 
     def stop(self) -> None:
-        if self.proc is None:
-            return
-        if self.proc.poll() is not None:
+        self._close_log_file()
+        proc = self.proc
+        if proc is None:
             return
 
-        self.proc.terminate()
-        with suppress(subprocess.TimeoutExpired):
-            self.proc.wait(timeout=5)
-
-        if self.proc.poll() is None:
-            self.proc.kill()
+        if proc.poll() is None:
+            proc.terminate()
             with suppress(subprocess.TimeoutExpired):
-                self.proc.wait(timeout=5)
+                proc.wait(timeout=5)
+
+            if proc.poll() is None:
+                proc.kill()
+                with suppress(subprocess.TimeoutExpired):
+                    proc.wait(timeout=5)
+
+        # The child is gone, so both pipe threads see EOF; join them so a
+        # restart can never race a stale reader against the new process.
+        if self.reader_thread is not None:
+            self.reader_thread.join(timeout=5)
+            self.reader_thread = None
+        if self.stderr_thread is not None:
+            self.stderr_thread.join(timeout=5)
+            self.stderr_thread = None
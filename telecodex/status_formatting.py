@@ -1,8 +1,11 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Any
 
+UTC_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S UTC'
+
 
 def format_rate_limit_bucket(bucket: Any) -> str:
     if not isinstance(bucket, dict):
@@ -40,5 +43,11 @@ def format_token_usage(usage: Any) -> str:
 def format_utc_timestamp(value: Any) -> str:
     if not isinstance(value, (int, float)):
         return 'n/a'
+    return _format_utc_timestamp_cached(value)
+
+
+@lru_cache(maxsize=128)
+def _format_utc_timestamp_cached(value: int | float) -> str:
+    # resetsAt timestamps repeat across consecutive /status calls.
     dt = datetime.fromtimestamp(value, tz=timezone.utc)
-    return dt.strftime('%Y-%m-%d %H:%M:%S UTC')
+    return dt.strftime(UTC_TIMESTAMP_FORMAT)
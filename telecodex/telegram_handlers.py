@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 import asyncio
-import html
-import json
+import io
+import re
 import sys
+import time
+from functools import partial
 from typing import Any
 
 from telegram import BotCommand, InlineKeyboardButton, InlineKeyboardMarkup, Update
@@ -20,6 +22,30 @@ from telecodex.status_formatting import (
 )
 
 PENDING_MODEL_INPUT_KEY = 'pending_model_input'
+# Dedicated pool for codex.ask so long turns never starve the default to_thread executor.
+CODEX_EXECUTOR_KEY = 'codex_executor'
+MODELS_CACHE_KEY = 'models_cache'
+MODELS_CACHE_TTL_SECONDS = 60.0
+
+# Below the 4000-char blockquote payload cap to leave headroom for HTML escaping.
+VERBOSE_BATCH_MAX_CHARS = 3800
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+# Compiled once; run_bot re-registers handlers on every reconnect loop iteration.
+MODEL_SET_PATTERN = re.compile(r'^model:set:')
+MODEL_FREE_TEXT_PATTERN = re.compile(r'^model:free_text$')
+MODEL_CANCEL_PATTERN = re.compile(r'^model:cancel$')
+
+BOT_COMMANDS = [
+    BotCommand(command='start', description='Start conversation with Codex'),
+    BotCommand(command='verbose', description='Toggle verbose ACP debug messages'),
+    BotCommand(command='status', description='Show latest ACP rate-limit updates'),
+    BotCommand(command='model', description='Choose the Codex model'),
+]
+# Throttle partial-reply edits to stay well inside Telegram's edit rate limits.
+STREAM_EDIT_INTERVAL_SECONDS = 1.0
+STREAM_EDIT_MIN_NEW_CHARS = 200
 
 
 def is_allowed_sender(update: Update, allowed_sender_id: Any) -> bool:
@@ -29,36 +55,45 @@ def is_allowed_sender(update: Update, allowed_sender_id: Any) -> bool:
     return user.id == allowed_sender_id
 
 
-def register_handlers(application: Any) -> None:
-    application.add_handler(CommandHandler('start', handle_start_command))
-    application.add_handler(CommandHandler('verbose', handle_verbose_command))
-    application.add_handler(CommandHandler('status', handle_status_command))
-    application.add_handler(CommandHandler('model', handle_model_command))
-    application.add_handler(CallbackQueryHandler(handle_model_callback, pattern=r'^model:(set:|free_text$|cancel$)'))
-    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
+def register_handlers(application: Any, allowed_user_id: int) -> None:
+    # PTB filters reject foreign updates before any handler coroutine is scheduled;
+    # only CallbackQueryHandler lacks filter support and keeps an in-handler check.
+    user_filter = filters.User(user_id=allowed_user_id)
+    application.add_handler(CommandHandler('start', handle_start_command, filters=user_filter))
+    application.add_handler(CommandHandler('verbose', handle_verbose_command, filters=user_filter))
+    application.add_handler(CommandHandler('status', handle_status_command, filters=user_filter))
+    application.add_handler(CommandHandler('model', handle_model_command, filters=user_filter))
+    application.add_handler(CallbackQueryHandler(handle_model_set, pattern=MODEL_SET_PATTERN))
+    application.add_handler(CallbackQueryHandler(handle_model_free_text, pattern=MODEL_FREE_TEXT_PATTERN))
+    application.add_handler(CallbackQueryHandler(handle_model_cancel, pattern=MODEL_CANCEL_PATTERN))
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND & user_filter, handle_message))
     application.add_error_handler(handle_error)
 
 
 def format_raw_json_markdown(raw_message: str) -> str:
-    safe_raw = raw_message.replace('```', '``\\`')
+    # JSON payloads almost never contain a code fence; skip the allocating
+    # replace pass when the containment scan comes up empty.
+    safe_raw = raw_message if '```' not in raw_message else raw_message.replace('```', '``\\`')
     return f'```json\n{safe_raw}\n```'
 
 
+# Only &, < and > are special inside Telegram HTML text; a translate table
+# escapes them in one C-level pass instead of html.escape's chained replaces.
+HTML_ESCAPE_TABLE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;'})
+
+
 def format_raw_json_expandable_blockquote(raw_message: str) -> str:
-    escaped = html.escape(raw_message)
-    return f'<blockquote expandable>{escaped}</blockquote>'
+    if '&' in raw_message or '<' in raw_message or '>' in raw_message:
+        raw_message = raw_message.translate(HTML_ESCAPE_TABLE)
+    return f'<blockquote expandable>{raw_message}</blockquote>'
 
 
-def is_delta_message(raw_message: str) -> bool:
-    try:
-        msg = json.loads(raw_message)
-    except json.JSONDecodeError:
-        return False
+def is_delta_message(msg: Any) -> bool:
     if not isinstance(msg, dict):
         return False
 
     method = msg.get('method')
-    if isinstance(method, str) and 'delta' in method.lower():
+    if isinstance(method, str) and ('delta' in method or 'Delta' in method):
         return True
 
     params = msg.get('params')
@@ -66,14 +101,14 @@ def is_delta_message(raw_message: str) -> bool:
         nested_msg = params.get('msg')
         if isinstance(nested_msg, dict):
             msg_type = nested_msg.get('type')
-            if isinstance(msg_type, str) and 'delta' in msg_type.lower():
+            if isinstance(msg_type, str) and ('delta' in msg_type or 'Delta' in msg_type):
                 return True
 
     return False
 
 
 async def reply_markdown(message: Any, text: str, reply_to_message_id: int) -> None:
-    text = text[:4096]
+    text = text[:TELEGRAM_MESSAGE_LIMIT]
     try:
         await message.reply_text(
             text,
@@ -89,6 +124,55 @@ async def reply_markdown(message: Any, text: str, reply_to_message_id: int) -> N
         )
 
 
+async def edit_markdown(message: Any, text: str) -> None:
+    text = text[:TELEGRAM_MESSAGE_LIMIT]
+    try:
+        await message.edit_text(text, parse_mode=ParseMode.MARKDOWN, disable_web_page_preview=True)
+    except BadRequest:
+        try:
+            await message.edit_text(text, disable_web_page_preview=True)
+        except BadRequest:
+            # e.g. the final text matches the last streamed partial.
+            pass
+
+
+async def stream_partial_replies(message: Any, deltas: 'asyncio.Queue[str | None]') -> Any:
+    """Relay accumulated deltas into one Telegram message, edited as the text grows.
+
+    Returns the streamed partial message, or None when the reply finished before
+    the first partial was worth sending.
+    """
+    sent = None
+    chunks: list[str] = []
+    sent_len = 0
+    last_edit = 0.0
+    while True:
+        delta = await deltas.get()
+        if delta is None:
+            return sent
+        chunks.append(delta)
+        text = ''.join(chunks).strip()
+        if len(text) - sent_len < STREAM_EDIT_MIN_NEW_CHARS:
+            continue
+        now = time.monotonic()
+        if now - last_edit < STREAM_EDIT_INTERVAL_SECONDS:
+            continue
+        payload = text[:TELEGRAM_MESSAGE_LIMIT]
+        try:
+            if sent is None:
+                sent = await message.reply_text(
+                    payload,
+                    reply_to_message_id=message.message_id,
+                    disable_web_page_preview=True,
+                )
+            else:
+                await sent.edit_text(payload, disable_web_page_preview=True)
+        except BadRequest:
+            continue
+        sent_len = len(text)
+        last_edit = now
+
+
 async def reply_expandable_blockquote(message: Any, text: str, reply_to_message_id: int) -> None:
     max_payload = 4000
     payload = text[:max_payload]
@@ -107,26 +191,68 @@ async def reply_expandable_blockquote(message: Any, text: str, reply_to_message_
         )
 
 
+def batch_verbose_messages(
+    unprocessed_messages: list[tuple[dict[str, Any], str]], max_chars: int = VERBOSE_BATCH_MAX_CHARS
+) -> list[str]:
+    batches: list[str] = []
+    current: list[str] = []
+    current_len = 0
+    for msg, raw_message in unprocessed_messages:
+        if is_delta_message(msg):
+            continue
+        if current and current_len + len(raw_message) + 2 > max_chars:
+            batches.append('\n\n'.join(current))
+            current = []
+            current_len = 0
+        current.append(raw_message)
+        current_len += len(raw_message) + 2
+    if current:
+        batches.append('\n\n'.join(current))
+    return batches
+
+
 async def process_user_input(message: Any, context: ContextTypes.DEFAULT_TYPE, text: str) -> None:
     codex = context.application.bot_data['codex']
     assert isinstance(codex, CodexStdioClient)
 
     await context.bot.send_chat_action(chat_id=message.chat_id, action=ChatAction.TYPING)
 
+    loop = asyncio.get_running_loop()
+    deltas: asyncio.Queue[str | None] = asyncio.Queue()
+
+    def on_delta(delta: str) -> None:
+        loop.call_soon_threadsafe(deltas.put_nowait, delta)
+
+    executor = context.application.bot_data[CODEX_EXECUTOR_KEY]
+    verbose = bool(context.application.bot_data.get('verbose'))
+    consumer = asyncio.create_task(stream_partial_replies(message, deltas))
     try:
-        ask_result = await asyncio.to_thread(codex.ask, text)
+        # Only collect the raw traffic when verbose mode will actually render it.
+        ask = partial(codex.ask, text, on_delta, collect_unprocessed=verbose)
+        ask_result = await loop.run_in_executor(executor, ask)
         assert isinstance(ask_result, AskResult)
     except Exception as exc:  # noqa: BLE001
+        deltas.put_nowait(None)
+        await consumer
         await reply_markdown(message, f'app-server error: {exc}', reply_to_message_id=message.message_id)
         return
+    deltas.put_nowait(None)
+    streamed = await consumer
 
-    await reply_markdown(message, ask_result.reply, reply_to_message_id=message.message_id)
+    if streamed is None:
+        await reply_markdown(message, ask_result.reply, reply_to_message_id=message.message_id)
+    else:
+        await edit_markdown(streamed, ask_result.reply)
 
-    if context.application.bot_data.get('verbose'):
-        for raw_message in ask_result.unprocessed_messages:
-            if is_delta_message(raw_message):
-                continue
-            await reply_expandable_blockquote(message, raw_message, reply_to_message_id=message.message_id)
+    if verbose:
+        batches = batch_verbose_messages(ask_result.unprocessed_messages)
+        if batches:
+            await asyncio.gather(
+                *(
+                    reply_expandable_blockquote(message, batch, reply_to_message_id=message.message_id)
+                    for batch in batches
+                )
+            )
 
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -137,10 +263,6 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     if not text:
         return
 
-    allowed_sender_id = context.application.bot_data.get('allowed_chat_id')
-    if not is_allowed_sender(update, allowed_sender_id):
-        return
-
     if context.application.bot_data.get(PENDING_MODEL_INPUT_KEY):
         codex = context.application.bot_data['codex']
         assert isinstance(codex, CodexStdioClient)
@@ -160,9 +282,6 @@ async def handle_start_command(update: Update, context: ContextTypes.DEFAULT_TYP
     message = update.effective_message
     if message is None:
         return
-    allowed_sender_id = context.application.bot_data.get('allowed_chat_id')
-    if not is_allowed_sender(update, allowed_sender_id):
-        return
     await process_user_input(message, context, 'hello')
 
 
@@ -170,9 +289,6 @@ async def handle_verbose_command(update: Update, context: ContextTypes.DEFAULT_T
     message = update.effective_message
     if message is None:
         return
-    allowed_sender_id = context.application.bot_data.get('allowed_chat_id')
-    if not is_allowed_sender(update, allowed_sender_id):
-        return
     verbose = bool(context.application.bot_data.get('verbose'))
     verbose = not verbose
     context.application.bot_data['verbose'] = verbose
@@ -184,9 +300,6 @@ async def handle_status_command(update: Update, context: ContextTypes.DEFAULT_TY
     message = update.effective_message
     if message is None:
         return
-    allowed_sender_id = context.application.bot_data.get('allowed_chat_id')
-    if not is_allowed_sender(update, allowed_sender_id):
-        return
 
     codex = context.application.bot_data['codex']
     assert isinstance(codex, CodexStdioClient)
@@ -200,62 +313,72 @@ async def handle_status_command(update: Update, context: ContextTypes.DEFAULT_TY
         )
         return
 
-    lines: list[str] = []
+    buf = io.StringIO()
     if snapshot:
         sorted_limits = sorted(snapshot.items(), key=lambda item: str(item[0]))
-        visible_limits = [(limit_id, values) for limit_id, values in sorted_limits if should_render_rate_limit(values)]
-        hidden_limit_names = [
-            format_limit_name(limit_id) for limit_id, values in sorted_limits if not should_render_rate_limit(values)
-        ]
+        visible_limits: list[tuple[Any, dict[str, Any]]] = []
+        hidden_limit_names: list[str] = []
+        for limit_id, values in sorted_limits:
+            if should_render_rate_limit(values):
+                visible_limits.append((limit_id, values))
+            else:
+                hidden_limit_names.append(format_limit_name(limit_id))
         if visible_limits or hidden_limit_names:
-            lines.append('')
-            lines.append('*Rate Limits*')
+            buf.write('\n*Rate Limits*')
             for limit_id, values in visible_limits:
-                limit_name = format_limit_name(limit_id)
-                lines.append('')
-                lines.append(f'*Limit:* `{limit_name}`')
-
-                primary = values.get('primary')
-                secondary = values.get('secondary')
-                lines.append(f'*Primary:* {format_rate_limit_bucket(primary)}')
-                lines.append(f'*Secondary:* {format_rate_limit_bucket(secondary)}')
+                buf.write(
+                    f'\n\n*Limit:* `{format_limit_name(limit_id)}`'
+                    f'\n*Primary:* {format_rate_limit_bucket(values.get("primary"))}'
+                    f'\n*Secondary:* {format_rate_limit_bucket(values.get("secondary"))}'
+                )
             if hidden_limit_names:
-                lines.append('')
-                lines.append(f'*Unused limits:* `{", ".join(hidden_limit_names)}`')
+                buf.write(f'\n\n*Unused limits:* `{", ".join(hidden_limit_names)}`')
 
     if token_usage:
-        lines.append('')
-        lines.append('*Token Usage*')
-        total = token_usage.get('total_token_usage')
-        last = token_usage.get('last_token_usage')
-        model_context_window = token_usage.get('model_context_window')
-        lines.append(f'*Total:* {format_token_usage(total)}')
-        lines.append(f'*Last:* {format_token_usage(last)}')
-        lines.append(f'*Model Context Window:* `{model_context_window}`')
+        if buf.tell():
+            buf.write('\n')
+        buf.write(
+            '\n*Token Usage*'
+            f'\n*Total:* {format_token_usage(token_usage.get("total_token_usage"))}'
+            f'\n*Last:* {format_token_usage(token_usage.get("last_token_usage"))}'
+            f'\n*Model Context Window:* `{token_usage.get("model_context_window")}`'
+        )
+
+    await reply_markdown(message, buf.getvalue(), reply_to_message_id=message.message_id)
 
-    await reply_markdown(message, '\n'.join(lines), reply_to_message_id=message.message_id)
+
+async def list_models_cached(context: ContextTypes.DEFAULT_TYPE) -> list[ModelOption]:
+    cached = context.application.bot_data.get(MODELS_CACHE_KEY)
+    now = time.monotonic()
+    if cached is not None:
+        cached_at, models = cached
+        if now - cached_at < MODELS_CACHE_TTL_SECONDS:
+            return models
+
+    codex = context.application.bot_data['codex']
+    assert isinstance(codex, CodexStdioClient)
+    models = await asyncio.to_thread(codex.list_models)
+    context.application.bot_data[MODELS_CACHE_KEY] = (now, models)
+    return models
 
 
 def build_model_menu(models: list[ModelOption], selected_model: str) -> InlineKeyboardMarkup:
-    rows: list[list[InlineKeyboardButton]] = []
-    for model in models:
-        marker = '✅ ' if model.model_id == selected_model else ''
-        label = f'{marker}{model.display_name}'
-        rows.append([InlineKeyboardButton(text=label, callback_data=f'model:set:{model.model_id}')])
+    rows = [
+        [
+            InlineKeyboardButton(
+                text='✅ ' + model.display_name if model.model_id == selected_model else model.display_name,
+                callback_data=f'model:set:{model.model_id}',
+            )
+        ]
+        for model in models
+    ]
     rows.append([InlineKeyboardButton(text='Free text', callback_data='model:free_text')])
     rows.append([InlineKeyboardButton(text='Cancel', callback_data='model:cancel')])
     return InlineKeyboardMarkup(rows)
 
 
 async def setup_bot_commands(application: Any) -> None:
-    await application.bot.set_my_commands(
-        [
-            BotCommand(command='start', description='Start conversation with Codex'),
-            BotCommand(command='verbose', description='Toggle verbose ACP debug messages'),
-            BotCommand(command='status', description='Show latest ACP rate-limit updates'),
-            BotCommand(command='model', description='Choose the Codex model'),
-        ]
-    )
+    await application.bot.set_my_commands(BOT_COMMANDS)
 
 
 async def handle_error(_: object, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -266,15 +389,12 @@ async def handle_model_command(update: Update, context: ContextTypes.DEFAULT_TYP
     message = update.effective_message
     if message is None:
         return
-    allowed_sender_id = context.application.bot_data.get('allowed_chat_id')
-    if not is_allowed_sender(update, allowed_sender_id):
-        return
 
     codex = context.application.bot_data['codex']
     assert isinstance(codex, CodexStdioClient)
 
     try:
-        models = await asyncio.to_thread(codex.list_models)
+        models = await list_models_cached(context)
         selected_model = await asyncio.to_thread(codex.get_model)
     except Exception as exc:  # noqa: BLE001
         await reply_markdown(message, f'app-server error: {exc}', reply_to_message_id=message.message_id)
@@ -294,44 +414,47 @@ async def handle_model_command(update: Update, context: ContextTypes.DEFAULT_TYP
     )
 
 
-async def handle_model_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+async def authorized_callback_query(update: Update, context: ContextTypes.DEFAULT_TYPE) -> Any:
+    """Return the callback query when it comes from the allowed sender, else None."""
     query = update.callback_query
     if query is None:
-        return
-
-    message = query.message
-    if message is None:
-        await query.answer()
-        return
-
+        return None
     allowed_sender_id = context.application.bot_data.get('allowed_chat_id')
-    if not is_allowed_sender(update, allowed_sender_id):
+    if query.message is None or not is_allowed_sender(update, allowed_sender_id):
         await query.answer()
-        return
+        return None
+    return query
 
-    data = query.data or ''
-    if data == 'model:cancel':
-        context.application.bot_data[PENDING_MODEL_INPUT_KEY] = False
-        await query.answer('Canceled')
-        await query.edit_message_reply_markup(reply_markup=None)
+
+async def handle_model_cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    query = await authorized_callback_query(update, context)
+    if query is None:
         return
+    context.application.bot_data[PENDING_MODEL_INPUT_KEY] = False
+    await query.answer('Canceled')
+    await query.edit_message_reply_markup(reply_markup=None)
 
-    if data == 'model:free_text':
-        context.application.bot_data[PENDING_MODEL_INPUT_KEY] = True
-        await query.answer()
-        await query.edit_message_text('Send the model id as a text message. It will be used for next turns.')
+
+async def handle_model_free_text(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    query = await authorized_callback_query(update, context)
+    if query is None:
         return
+    context.application.bot_data[PENDING_MODEL_INPUT_KEY] = True
+    await query.answer()
+    await query.edit_message_text('Send the model id as a text message. It will be used for next turns.')
 
-    if not data.startswith('model:set:'):
-        await query.answer()
+
+async def handle_model_set(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    query = await authorized_callback_query(update, context)
+    if query is None:
         return
 
-    model_id = data.removeprefix('model:set:')
+    model_id = (query.data or '').removeprefix('model:set:')
     codex = context.application.bot_data['codex']
     assert isinstance(codex, CodexStdioClient)
 
     try:
-        models = await asyncio.to_thread(codex.list_models)
+        models = await list_models_cached(context)
     except Exception as exc:  # noqa: BLE001
         await query.answer('Failed to load models')
         await query.edit_message_text(f'Could not load models: {exc}')
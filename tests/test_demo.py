@@ -1,52 +1,60 @@
+import os
 import tempfile
 import unittest
 from pathlib import Path
 
-from telecodex.__main__ import load_settings_from_toml
+from telecodex._config import load_settings_from_toml, parse_settings_from_toml
+
+SECTIONED_TOML = b"""[telecodex]
+telegram_bot_token = "token"
+allowed_chat_id = 1234567890
+acp_log_file = "/tmp/acp.log"
+poll_timeout_seconds = 45
+codex_model = "gpt-5"
+"""
+
+TOP_LEVEL_TOML = b"""telegram_bot_token = "top"
+allowed_chat_id = 123
+unknown_key = "ignored"
+"""
+
+EXPECTED_SECTIONED = {
+    'telegram_bot_token': 'token',
+    'allowed_chat_id': 1234567890,
+    'acp_log_file': '/tmp/acp.log',
+    'poll_timeout_seconds': 45,
+    'codex_model': 'gpt-5',
+}
+
+EXPECTED_TOP_LEVEL = {'telegram_bot_token': 'top', 'allowed_chat_id': 123}
+
+
+def fast_tempdir() -> tempfile.TemporaryDirectory:
+    """Place temp files on tmpfs when available so test writes never hit disk."""
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return tempfile.TemporaryDirectory(dir='/dev/shm')
+    return tempfile.TemporaryDirectory()
 
 
 class TestLoadSettingsFromToml(unittest.TestCase):
-    def test_reads_telecodex_section(self) -> None:
-        with tempfile.TemporaryDirectory() as tmpdir:
-            config = Path(tmpdir) / 'config.toml'
-            config.write_text(
-                '\n'.join(
-                    [
-                        '[telecodex]',
-                        'telegram_bot_token = "token"',
-                        'allowed_chat_id = 1234567890',
-                        'acp_log_file = "/tmp/acp.log"',
-                        'poll_timeout_seconds = 45',
-                        'codex_model = "gpt-5"',
-                    ]
-                )
-                + '\n',
-                encoding='utf-8',
-            )
-
-            values = load_settings_from_toml(str(config))
-
-            self.assertEqual(values['telegram_bot_token'], 'token')
-            self.assertEqual(values['allowed_chat_id'], 1234567890)
-            self.assertEqual(values['acp_log_file'], '/tmp/acp.log')
-            self.assertEqual(values['poll_timeout_seconds'], 45)
-            self.assertEqual(values['codex_model'], 'gpt-5')
-
-    def test_uses_top_level_when_section_missing(self) -> None:
-        with tempfile.TemporaryDirectory() as tmpdir:
-            config = Path(tmpdir) / 'config.toml'
-            config.write_text(
-                '\n'.join(
-                    [
-                        'telegram_bot_token = "top"',
-                        'allowed_chat_id = 123',
-                        'unknown_key = "ignored"',
-                    ]
-                )
-                + '\n',
-                encoding='utf-8',
-            )
-
-            values = load_settings_from_toml(str(config))
-
-            self.assertEqual(values, {'telegram_bot_token': 'top', 'allowed_chat_id': 123})
+    @classmethod
+    def setUpClass(cls) -> None:
+        # One tempdir for the whole class; each test writes its own file in it.
+        cls._tmp = fast_tempdir()
+        cls.tmpdir = Path(cls._tmp.name)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls._tmp.cleanup()
+
+    def test_load_settings(self) -> None:
+        cases = (
+            ('sectioned', SECTIONED_TOML, EXPECTED_SECTIONED),
+            ('top_level', TOP_LEVEL_TOML, EXPECTED_TOP_LEVEL),
+        )
+        for name, payload, expected in cases:
+            with self.subTest(name=name):
+                self.assertEqual(parse_settings_from_toml(payload), expected)
+                config = self.tmpdir / f'{name}.toml'
+                config.write_bytes(payload)
+                self.assertEqual(load_settings_from_toml(os.fspath(config)), expected)